@@ -1,11 +1,42 @@
 import threading
-from elasticsearch import Transport
+
+try:
+    import contextvars
+except ImportError:
+    contextvars = None
+
+try:
+    # elasticsearch-py < 8.0 ships its own Transport.
+    from elasticsearch import Transport
+    _legacy_transport = True
+except ImportError:
+    # elasticsearch-py >= 8.0 moved it to elastic-transport.
+    from elastic_transport import Transport
+    _legacy_transport = False
 
 g_tracer = None
 g_trace_all_requests = False
 g_trace_prefix = None
 
-tls = threading.local()
+class _ThreadLocalVar(threading.local):
+    """Fallback for ContextVar where contextvars is not available."""
+
+    def __init__(self, name, default):
+        self.value = default
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+# Context variables follow asyncio tasks as well as threads.
+if contextvars is not None:
+    _tracing_enabled = contextvars.ContextVar('tracing_enabled', default=False)
+    _active_span = contextvars.ContextVar('active_span', default=None)
+else:
+    _tracing_enabled = _ThreadLocalVar('tracing_enabled', default=False)
+    _active_span = _ThreadLocalVar('active_span', default=None)
 
 def init_tracing(tracer, trace_all_requests=True, prefix='Elasticsearch'):
     global g_tracer, g_trace_all_requests, g_trace_prefix
@@ -17,29 +48,29 @@ def init_tracing(tracer, trace_all_requests=True, prefix='Elasticsearch'):
     g_trace_prefix = prefix
 
 def enable_tracing():
-    tls.tracing_enabled = True
+    _tracing_enabled.set(True)
 
 def disable_tracing():
-    tls.tracing_enabled = False
+    _tracing_enabled.set(False)
 
 def get_active_span():
-    return getattr(tls, 'active_span', None)
+    return _active_span.get()
 
 def set_active_span(span):
-    tls.active_span = span
+    _active_span.set(span)
 
 def clear_active_span():
-    tls.active_span = None
+    _active_span.set(None)
 
 def _get_tracing_enabled():
     if g_trace_all_requests:
         return True
 
-    return getattr(tls, 'tracing_enabled', False)
+    return _tracing_enabled.get()
 
 def _clear_tracing_state():
-    tls.tracing_enabled = False
-    tls.active_span = None
+    _tracing_enabled.set(False)
+    _active_span.set(None)
 
 # Values to add as tags from the actual
 # payload returned by Elasticsearch, if any.
@@ -49,48 +80,110 @@ ResultMembersToAdd = [
     'took',
 ]
 
-class TracingTransport(Transport):
-    def __init__(self, *args, **kwargs):
-        super(TracingTransport, self).__init__(*args, **kwargs)
+def _start_span(method, url, params, body):
+    if g_tracer is None:
+        raise RuntimeError('No tracer has been set')
 
-    def perform_request(self, method, url, params=None, body=None):
-        if not _get_tracing_enabled():
-            return super(TracingTransport, self).perform_request(method, url, params, body)
+    op_name = url
+    if g_trace_prefix is not None:
+        op_name = str(g_trace_prefix) + url
 
-        if g_tracer is None:
-            raise RuntimeError('No tracer has been set')
+    span = g_tracer.start_span(op_name, child_of=get_active_span())
+    span.set_tag('component', 'elasticsearch-py')
+    span.set_tag('db.type', 'elasticsearch')
+    span.set_tag('span.kind', 'client')
+    span.set_tag('elasticsearch.url', url)
+    span.set_tag('elasticsearch.method', method)
 
-        op_name = url
-        if g_trace_prefix is not None:
-            op_name = str(g_trace_prefix) + url
+    if body:
+        span.set_tag('db.statement', body)
+    if params:
+        span.set_tag('elasticsearch.params', params)
 
-        span = g_tracer.start_span(op_name, child_of=get_active_span())
-        span.set_tag('component', 'elasticsearch-py')
-        span.set_tag('db.type', 'elasticsearch')
-        span.set_tag('span.kind', 'client')
-        span.set_tag('elasticsearch.url', url)
-        span.set_tag('elasticsearch.method', method)
+    return span
 
-        if body:
-            span.set_tag('db.statement', body)
-        if params:
-            span.set_tag('elasticsearch.params', params)
+def _set_result_tags(span, rv):
+    if isinstance(rv, dict):
+        for member in ResultMembersToAdd:
+            if member in rv:
+                span.set_tag('elasticsearch.{0}'.format(member), str(rv[member]))
 
-        try:
-            rv = super(TracingTransport, self).perform_request(method, url, params, body)
+def _finish_span_with_error(span, exc):
+    _clear_tracing_state()
+    span.set_tag('error', 'true')
+    span.set_tag('error.object', exc)
+    span.finish()
 
-            if isinstance(rv, dict):
-                for member in ResultMembersToAdd:
-                    if member in rv:
-                        span.set_tag('elasticsearch.{0}'.format(member), str(rv[member]))
+if _legacy_transport:
+    class TracingTransport(Transport):
+        def __init__(self, *args, **kwargs):
+            super(TracingTransport, self).__init__(*args, **kwargs)
+
+        def perform_request(self, method, url, params=None, body=None):
+            if not _get_tracing_enabled():
+                return super(TracingTransport, self).perform_request(method, url, params, body)
+
+            span = _start_span(method, url, params, body)
+
+            try:
+                rv = super(TracingTransport, self).perform_request(method, url, params, body)
+                _set_result_tags(span, rv)
+
+            except Exception as exc:
+                _finish_span_with_error(span, exc)
+                raise
 
-        except Exception as exc:
-            _clear_tracing_state()
-            span.set_tag('error', 'true')
-            span.set_tag('error.object', exc)
             span.finish()
-            raise
+            return rv
+
+else:
+    from urllib.parse import parse_qsl
+
+    def _start_target_span(method, target, body):
+        # The 8.x transport receives the query string already
+        # encoded into the target, so split it back into params.
+        url, _, query = target.partition('?')
+
+        params = {}
+        for key, value in parse_qsl(query, keep_blank_values=True):
+            if key not in params:
+                params[key] = value
+            elif isinstance(params[key], list):
+                params[key].append(value)
+            else:
+                params[key] = [params[key], value]
+
+        return _start_span(method, url, params, body)
+
+    def _finish_target_span(span, method, rv):
+        meta, body = rv
+        span.set_tag('http.status_code', meta.status)
+        _set_result_tags(span, body)
+
+        # The 8.x transport hands back error responses instead of raising,
+        # leaving it to the client, which may still ignore them
+        # (ignore_status, or HEAD 404s reported as False). So only tag them,
+        # and leave the tracing state alone.
+        if meta.status >= 400 and not (method == 'HEAD' and meta.status == 404):
+            span.set_tag('error', 'true')
 
         span.finish()
-        return rv
 
+    class TracingTransport(Transport):
+        def perform_request(self, method, target, **kwargs):
+            if not _get_tracing_enabled():
+                return super(TracingTransport, self).perform_request(method, target, **kwargs)
+
+            span = _start_target_span(method, target, kwargs.get('body'))
+
+            try:
+                rv = super(TracingTransport, self).perform_request(method, target, **kwargs)
+            except Exception as exc:
+                _finish_span_with_error(span, exc)
+                raise
+
+            _finish_target_span(span, method, rv)
+            return rv
+
+    # Kept apart so the package still imports on Python 2.
+    from ._async import AsyncTracingTransport
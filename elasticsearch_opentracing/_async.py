@@ -0,0 +1,20 @@
+from elastic_transport import AsyncTransport
+
+from . import _get_tracing_enabled, _start_target_span, \
+        _finish_span_with_error, _finish_target_span
+
+class AsyncTracingTransport(AsyncTransport):
+    async def perform_request(self, method, target, **kwargs):
+        if not _get_tracing_enabled():
+            return await super(AsyncTracingTransport, self).perform_request(method, target, **kwargs)
+
+        span = _start_target_span(method, target, kwargs.get('body'))
+
+        try:
+            rv = await super(AsyncTracingTransport, self).perform_request(method, target, **kwargs)
+        except Exception as exc:
+            _finish_span_with_error(span, exc)
+            raise
+
+        _finish_target_span(span, method, rv)
+        return rv
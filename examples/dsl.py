@@ -1,4 +1,4 @@
-from elasticsearch import Elasticsearch, Transport
+from elasticsearch import Elasticsearch
 from elasticsearch_dsl import Search, Q
 
 import opentracing
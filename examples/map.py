@@ -1,5 +1,4 @@
 from datetime import datetime
-from elasticsearch import Transport
 from elasticsearch_dsl import DocType, Date, Integer, Keyword, Text
 from elasticsearch_dsl.connections import connections
 
@@ -9,7 +9,7 @@ from elasticsearch_dsl.connections import connections
 from elasticsearch_dsl.response import Response
 from elasticsearch_opentracing import TracingTransport, init_tracing, \
         enable_tracing, disable_tracing, set_active_span, clear_active_span, \
-        get_active_span, _clear_tracing_state
+        get_active_span, _clear_tracing_state, _legacy_transport
 from mock import patch
 from .dummies import *
 
@@ -20,6 +20,7 @@ class Article(DocType):
     class Meta:
         index = 'test-index'
 
+@unittest.skipUnless(_legacy_transport, 'requires elasticsearch-py < 8.0')
 @patch('elasticsearch.Transport.perform_request')
 class TestTracing(unittest.TestCase):
     def setUp(self):
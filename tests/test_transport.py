@@ -0,0 +1,269 @@
+import asyncio
+import unittest
+
+from elasticsearch_opentracing import init_tracing, enable_tracing, \
+        set_active_span, get_active_span, _clear_tracing_state, \
+        _legacy_transport
+from mock import patch
+from .dummies import *
+
+if not _legacy_transport:
+    from elasticsearch import Elasticsearch, AsyncElasticsearch, NotFoundError
+    from elastic_transport import ApiResponseMeta, BaseAsyncNode, HttpHeaders, \
+            NodeConfig, TransportApiResponse
+    from elasticsearch_opentracing import TracingTransport, AsyncTracingTransport
+
+def make_response(body, status=200):
+    meta = ApiResponseMeta(status=status, http_version='1.1',
+                           headers=HttpHeaders({'x-elastic-product': 'Elasticsearch'}),
+                           duration=0.0, node=NodeConfig('http', 'localhost', 9200))
+    return TransportApiResponse(meta, body)
+
+@unittest.skipIf(_legacy_transport, 'requires elasticsearch-py >= 8.0')
+@patch('elastic_transport.Transport.perform_request')
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.tracer = DummyTracer()
+        self.es = Elasticsearch('http://localhost:9200', transport_class=TracingTransport)
+
+    def tearDown(self):
+        _clear_tracing_state()
+
+    def test_tracing(self, mock_perform_req):
+        init_tracing(self.tracer, trace_all_requests=False, prefix='Prod007')
+
+        mock_perform_req.return_value = make_response({'result': 'created'})
+
+        main_span = DummySpan()
+        set_active_span(main_span)
+        enable_tracing()
+
+        body = {'any': 'data'}
+        res = self.es.index(index='test-index', id=1, document=body, refresh=True)
+        self.assertEqual({'result': 'created'}, res.body)
+        self.assertEqual(1, len(self.tracer.spans))
+        self.assertEqual(self.tracer.spans[0].operation_name, 'Prod007/test-index/_doc/1')
+        self.assertEqual(self.tracer.spans[0].is_finished, True)
+        self.assertEqual(self.tracer.spans[0].child_of, main_span)
+        self.assertEqual(self.tracer.spans[0].tags, {
+            'component': 'elasticsearch-py',
+            'db.type': 'elasticsearch',
+            'db.statement': body,
+            'span.kind': 'client',
+            'http.status_code': 200,
+            'elasticsearch.url': '/test-index/_doc/1',
+            'elasticsearch.method': 'PUT',
+            'elasticsearch.params': {'refresh': 'true'},
+        })
+
+    def test_trace_none(self, mock_perform_req):
+        init_tracing(self.tracer, trace_all_requests=False)
+        mock_perform_req.return_value = make_response({})
+
+        self.es.get(index='test-index', id=3)
+        self.assertEqual(0, len(self.tracer.spans))
+
+    def test_trace_result_tags(self, mock_perform_req):
+        init_tracing(self.tracer)
+
+        mock_perform_req.return_value = make_response({
+            'found': False,
+            'timed_out': True,
+            'took': 7
+        })
+        self.es.search(index='test-index')
+
+        self.assertEqual(1, len(self.tracer.spans))
+        self.assertEqual('False', self.tracer.spans[0].tags['elasticsearch.found'])
+        self.assertEqual('True', self.tracer.spans[0].tags['elasticsearch.timed_out'])
+        self.assertEqual('7', self.tracer.spans[0].tags['elasticsearch.took'])
+
+    def test_trace_error_status(self, mock_perform_req):
+        init_tracing(self.tracer, trace_all_requests=False)
+        enable_tracing()
+
+        mock_perform_req.return_value = make_response({'found': False}, status=404)
+
+        with self.assertRaises(NotFoundError):
+            self.es.get(index='test-index', id=1)
+
+        self.assertEqual(1, len(self.tracer.spans))
+        self.assertEqual(True, self.tracer.spans[0].is_finished)
+        self.assertEqual(404, self.tracer.spans[0].tags['http.status_code'])
+        self.assertEqual('true', self.tracer.spans[0].tags['error'])
+
+    def test_trace_ignored_status(self, mock_perform_req):
+        init_tracing(self.tracer, trace_all_requests=False)
+
+        main_span = DummySpan()
+        set_active_span(main_span)
+        enable_tracing()
+
+        mock_perform_req.return_value = make_response({}, status=404)
+        self.es.options(ignore_status=404).indices.delete(index='test-index')
+
+        # The tracing section is still active.
+        self.assertEqual(main_span, get_active_span())
+        mock_perform_req.return_value = make_response({})
+        self.es.get(index='test-index', id=1)
+        self.assertEqual(2, len(self.tracer.spans))
+        self.assertEqual(main_span, self.tracer.spans[1].child_of)
+
+    def test_trace_params(self, mock_perform_req):
+        init_tracing(self.tracer)
+        mock_perform_req.return_value = make_response({})
+
+        self.es.transport.perform_request('GET', '/test-index/_search?q=&sort=a&sort=b')
+
+        self.assertEqual(1, len(self.tracer.spans))
+        self.assertEqual('/test-index/_search', self.tracer.spans[0].tags['elasticsearch.url'])
+        self.assertEqual({'q': '', 'sort': ['a', 'b']},
+                         self.tracer.spans[0].tags['elasticsearch.params'])
+
+    def test_trace_head_not_found(self, mock_perform_req):
+        init_tracing(self.tracer)
+
+        mock_perform_req.return_value = make_response(None, status=404)
+
+        self.assertFalse(self.es.exists(index='test-index', id=1))
+        self.assertEqual(1, len(self.tracer.spans))
+        self.assertNotIn('error', self.tracer.spans[0].tags)
+
+    def test_trace_error(self, mock_perform_req):
+        init_tracing(self.tracer)
+
+        main_span = DummySpan()
+        set_active_span(main_span)
+        mock_perform_req.side_effect = RuntimeError()
+
+        try:
+            self.es.get(index='test-index', id=1)
+        except RuntimeError as exc:
+            catched_exc = exc
+
+        self.assertEqual(1, len(self.tracer.spans))
+        self.assertEqual(True, self.tracer.spans[0].is_finished)
+        self.assertEqual(main_span, self.tracer.spans[0].child_of)
+        self.assertEqual('true', self.tracer.spans[0].tags['error'])
+        self.assertEqual(catched_exc, self.tracer.spans[0].tags['error.object'])
+
+if not _legacy_transport:
+    class DummyAsyncNode(BaseAsyncNode):
+        # Requests never reach the node, as the transport is patched,
+        # so no HTTP backend (aiohttp, httpx) is needed.
+        async def perform_request(self, *args, **kwargs):
+            raise NotImplementedError()
+
+        async def close(self):
+            pass
+
+@unittest.skipIf(_legacy_transport, 'requires elasticsearch-py >= 8.0')
+@patch('elastic_transport.AsyncTransport.perform_request')
+class TestAsyncTracing(unittest.TestCase):
+    def setUp(self):
+        self.tracer = DummyTracer()
+        self.loop = asyncio.new_event_loop()
+        self.es = AsyncElasticsearch('http://localhost:9200',
+                                     transport_class=AsyncTracingTransport,
+                                     node_class=DummyAsyncNode)
+
+    def tearDown(self):
+        _clear_tracing_state()
+        self.loop.run_until_complete(self.es.close())
+        self.loop.close()
+
+    def test_tracing(self, mock_perform_req):
+        init_tracing(self.tracer, trace_all_requests=False)
+
+        mock_perform_req.return_value = make_response({'found': True})
+
+        main_span = DummySpan()
+        set_active_span(main_span)
+        enable_tracing()
+
+        res = self.loop.run_until_complete(self.es.get(index='test-index', id=1))
+        self.assertEqual({'found': True}, res.body)
+        self.assertEqual(1, len(self.tracer.spans))
+        self.assertEqual(self.tracer.spans[0].operation_name, 'Elasticsearch/test-index/_doc/1')
+        self.assertEqual(self.tracer.spans[0].is_finished, True)
+        self.assertEqual(self.tracer.spans[0].child_of, main_span)
+        self.assertEqual('GET', self.tracer.spans[0].tags['elasticsearch.method'])
+        self.assertEqual('True', self.tracer.spans[0].tags['elasticsearch.found'])
+
+    def test_trace_error(self, mock_perform_req):
+        init_tracing(self.tracer)
+
+        mock_perform_req.side_effect = RuntimeError()
+
+        with self.assertRaises(RuntimeError):
+            self.loop.run_until_complete(self.es.get(index='test-index', id=1))
+
+        self.assertEqual(1, len(self.tracer.spans))
+        self.assertEqual(True, self.tracer.spans[0].is_finished)
+        self.assertEqual('true', self.tracer.spans[0].tags['error'])
+
+    def test_concurrent_tasks(self, mock_perform_req):
+        init_tracing(self.tracer, trace_all_requests=False)
+
+        mock_perform_req.return_value = make_response({})
+        spans = [DummySpan(), DummySpan()]
+
+        async def target(i):
+            set_active_span(spans[i])
+            enable_tracing()
+            await asyncio.sleep(0)
+            await self.es.get(index='test-index', id=i)
+
+        async def main():
+            await asyncio.gather(target(0), target(1))
+
+        self.loop.run_until_complete(main())
+
+        self.assertEqual(2, len(self.tracer.spans))
+        self.assertTrue(all(map(lambda x: x.is_finished, self.tracer.spans)))
+        self.assertEqual({spans[0], spans[1]},
+                         set(map(lambda x: x.child_of, self.tracer.spans)))
+        for span in self.tracer.spans:
+            i = int(span.tags['elasticsearch.url'].rsplit('/', 1)[1])
+            self.assertEqual(spans[i], span.child_of)
+
+    def test_concurrent_error(self, mock_perform_req):
+        init_tracing(self.tracer, trace_all_requests=False)
+
+        main_span = DummySpan()
+        ev = asyncio.Event()
+
+        async def perform_request(method, target, **kwargs):
+            if target.endswith('/1'):
+                raise RuntimeError()
+            await ev.wait()
+            return make_response({})
+
+        mock_perform_req.side_effect = perform_request
+
+        async def failing():
+            enable_tracing()
+            try:
+                await self.es.get(index='test-index', id=1)
+            finally:
+                ev.set()
+
+        async def waiting():
+            set_active_span(main_span)
+            enable_tracing()
+            await self.es.get(index='test-index', id=2)
+            # An error in another task must not end this tracing section.
+            await self.es.get(index='test-index', id=3)
+
+        async def main():
+            return await asyncio.gather(waiting(), failing(), return_exceptions=True)
+
+        results = self.loop.run_until_complete(main())
+
+        self.assertEqual(None, results[0])
+        self.assertTrue(isinstance(results[1], RuntimeError))
+        self.assertEqual(3, len(self.tracer.spans))
+        self.assertEqual([None, 'true', None],
+                         list(map(lambda x: x.tags.get('error'), self.tracer.spans)))
+        self.assertEqual([main_span, None, main_span],
+                         list(map(lambda x: x.child_of, self.tracer.spans)))